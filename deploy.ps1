@@ -61,6 +61,7 @@ $dockerfiles = @{
     "bronze" = "Dockerfile.bronze"
     "silver" = "Dockerfile.silver" 
     "gold" = "Dockerfile.gold"
+    "serving" = "Dockerfile.serving"
 }
 
 foreach ($layer in $dockerfiles.Keys) {
@@ -97,8 +98,12 @@ Write-Log "Imagens deployadas:"
 Write-Host "  - gcr.io/$ProjectId/etl-bronze"
 Write-Host "  - gcr.io/$ProjectId/etl-silver" 
 Write-Host "  - gcr.io/$ProjectId/etl-gold"
+Write-Host "  - gcr.io/$ProjectId/etl-serving"
 Write-Host ""
 Write-Log "Jobs Cloud Run criados:"
 Write-Host "  - etl-bronze-job-$Environment"
 Write-Host "  - etl-silver-job-$Environment"
-Write-Host "  - etl-gold-job-$Environment"
\ No newline at end of file
+Write-Host "  - etl-gold-job-$Environment"
+Write-Host ""
+Write-Log "Serviço Cloud Run criado:"
+Write-Host "  - kpi-serving-$Environment"
\ No newline at end of file
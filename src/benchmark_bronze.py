@@ -0,0 +1,110 @@
+import os, logging
+import argparse
+import resource
+import time
+from datetime import datetime, timezone
+import pandas as pd
+
+from bronze import clean_sales_data, clean_sales_data_parallel
+
+# Mede o caminho serial e o paralelo de clean_sales_data sobre o CSV local de vendas.
+# Importa bronze.py, então requer as mesmas credenciais GCP do ETL (GOOGLE_APPLICATION_CREDENTIALS).
+#
+#   python benchmark_bronze.py --scale 40 --workers 1 2 4
+#
+# Antes do benchmark, compara serial x paralelo em entradas de borda (check_edge_cases).
+
+DEFAULT_CSV = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "datasets",
+    "abi_bus_case1_beverage_sales_20210726.csv"
+)
+
+def peak_rss_mb() -> tuple:
+    """Pico de memória residente (MB) do processo pai e do maior worker."""
+    parent = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return parent, children
+
+def best_of(repeat: int, func):
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def edge_case_frames() -> dict:
+    """Entradas que já divergiram entre o caminho serial e o paralelo (partições de 2 workers)."""
+    def base(rows: int) -> pd.DataFrame:
+        return pd.DataFrame({
+            "DATE": ["1/1/2006"] * rows,
+            "CE_BRAND_FLVR": range(rows),
+            "BRAND_NM": ["LEMON"] * rows,
+            "Btlr_Org_LVL_C_Desc": ["CANADA"] * rows,
+            "TRADE_CHNL_DESC": ["SUPERETTE"] * rows,
+            "PKG_CAT": ["N20O"] * rows,
+            "$ Volume": ["10.5"] * rows,
+        })
+
+    cases = {}
+    df = base(100)
+    df["$ Volume"] = ["1,000"] * 50 + ["2.5"] * 50
+    cases["volume inteiro numa partição, decimal na outra"] = df
+
+    df = base(100)
+    df["$ Volume"] = [None] * 50 + ["2.5"] * 50
+    cases["volume todo nulo numa partição"] = df
+
+    df = base(100).astype(object)
+    df.loc[3, "BRAND_NM"] = 7
+    cases["coluna texto com tipos mistos"] = df
+
+    df = base(100)
+    df.loc[:49, "PKG_CAT"] = None
+    cases["coluna texto toda nula numa partição"] = df
+
+    df = base(100)
+    df.loc[:49, :] = None
+    cases["partição só com linhas vazias"] = df
+    return cases
+
+def check_edge_cases(workers: int = 2):
+    """Confere que o caminho paralelo devolve o mesmo DataFrame que o serial nos casos de borda."""
+    loaded_at = datetime.now(timezone.utc)
+    for name, df in edge_case_frames().items():
+        expected = clean_sales_data(df, loaded_at=loaded_at)
+        result = clean_sales_data_parallel(df, workers, loaded_at=loaded_at)
+        pd.testing.assert_frame_equal(expected, result, check_index_type=True)
+        print(f"OK: {name}")
+
+def run_benchmark(csv_path: str, scale: int, workers: list, repeat: int):
+    df = pd.read_csv(csv_path, sep='\t', encoding='utf-16')
+    df = pd.concat([df] * scale, ignore_index=True)
+    loaded_at = datetime.now(timezone.utc)
+    print(f"Linhas: {len(df)} | CPUs disponíveis: {len(os.sched_getaffinity(0))}")
+
+    serial_time, expected = best_of(repeat, lambda: clean_sales_data(df, loaded_at=loaded_at))
+    print(f"{'modo':<12}{'tempo (s)':>10}{'speedup':>10}{'RSS pai (MB)':>14}{'RSS worker (MB)':>17}")
+    print(f"{'serial':<12}{serial_time:>10.3f}{1:>10.2f}{peak_rss_mb()[0]:>14.0f}{'-':>17}")
+
+    for count in workers:
+        elapsed, result = best_of(
+            repeat, lambda: clean_sales_data_parallel(df, count, loaded_at=loaded_at)
+        )
+        pd.testing.assert_frame_equal(expected, result, check_index_type=True)
+        parent, children = peak_rss_mb()
+        print(f"{f'{count} workers':<12}{elapsed:>10.3f}{serial_time / elapsed:>10.2f}{parent:>14.0f}{children:>17.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da limpeza de vendas (serial x paralela)")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--scale", type=int, default=1, help="Replica o CSV N vezes")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-edge-cases", action="store_true", help="Não roda a checagem de casos de borda")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    if not args.skip_edge_cases:
+        check_edge_cases()
+    run_benchmark(args.csv, args.scale, args.workers, args.repeat)
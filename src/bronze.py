@@ -5,6 +5,11 @@ import hashlib
 from datetime import datetime, timezone
 import io
 import re
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pyarrow as pa
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,6 +20,7 @@ PROJECT_ID = os.getenv("PROJECT_ID", "ambev-2025")
 BUCKET_NAME = os.getenv("BUCKET_NAME")
 REGION = os.getenv("REGION", "us-central1")
 DATASET_BRONZE = os.getenv("DATASET_BRONZE", "abi_bronze")
+BRONZE_WORKERS = int(os.getenv("BRONZE_WORKERS", "1"))
 client = bigquery.Client(project=PROJECT_ID)
 storage_client = storage.Client(project=PROJECT_ID)
 
@@ -105,7 +111,7 @@ def log_data_quality_metrics(df: pd.DataFrame, table_name: str):
             if null_pct > 0:
                 logging.warning(f"    {col}: {null_pct:.2f}% nulls")
 
-def clean_sales_data(df: pd.DataFrame) -> pd.DataFrame:
+def clean_sales_data(df: pd.DataFrame, loaded_at: datetime = None) -> pd.DataFrame:
     """Limpeza básica dos dados de vendas para camada Bronze - SEM REMOÇÃO DE DADOS."""
     logging.info("Iniciando limpeza dos dados de vendas...")
     
@@ -153,7 +159,8 @@ def clean_sales_data(df: pd.DataFrame) -> pd.DataFrame:
             .replace(['', 'nan', 'None', 'NaN', 'NULL'], '0')
         )
         
-        df_clean['USD_VOLUME'] = pd.to_numeric(df_clean['USD_VOLUME'], errors='coerce')
+        # float64 fixo: o tipo não depende dos valores (ex.: só inteiros) nem da partição
+        df_clean['USD_VOLUME'] = pd.to_numeric(df_clean['USD_VOLUME'], errors='coerce').astype('float64')
         
         nan_after_conversion = df_clean['USD_VOLUME'].isna().sum()
         if nan_after_conversion > 0:
@@ -171,7 +178,7 @@ def clean_sales_data(df: pd.DataFrame) -> pd.DataFrame:
             logging.info(f"Preenchidas {invalid_dates} datas inválidas com data padrão")
     
     # Metadados
-    df_clean['LOADED_AT'] = datetime.now(timezone.utc)
+    df_clean['LOADED_AT'] = loaded_at or datetime.now(timezone.utc)
     df_clean['SOURCE_FILE'] = 'sales_raw'
     
     final_rows = len(df_clean)
@@ -183,6 +190,179 @@ def clean_sales_data(df: pd.DataFrame) -> pd.DataFrame:
     
     return df_clean
 
+def _write_arrow_file(sink, table: pa.Table, bounds: list):
+    """Escreve a tabela em formato Arrow IPC (file), um record batch por faixa de linhas."""
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        for start, end in bounds:
+            for batch in table.slice(start, end - start).combine_chunks().to_batches():
+                writer.write_batch(batch)
+
+def _table_to_shared_memory(table: pa.Table, bounds: list = None) -> tuple:
+    """Grava tabela Arrow em um bloco de memória compartilhada. Retorna (nome, tamanho)."""
+    bounds = bounds or [(0, table.num_rows)]
+    
+    # Primeira passada só mede o tamanho do arquivo, a segunda escreve direto no bloco
+    mock = pa.MockOutputStream()
+    _write_arrow_file(mock, table, bounds)
+    size = mock.size()
+    
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    target = pa.py_buffer(shm.buf)
+    try:
+        _write_arrow_file(pa.FixedSizeBufferWriter(target), table, bounds)
+    except Exception as e:
+        # Libera referências ao bloco presas no traceback antes de fechá-lo
+        traceback.clear_frames(e.__traceback__)
+        del target
+        shm.close()
+        shm.unlink()
+        raise
+    del target
+    shm.close()
+    return shm.name, size
+
+def _copy_arrow_batches(buf, size: int, batch: int = None) -> pa.Table:
+    reader = pa.ipc.open_file(pa.py_buffer(buf).slice(0, size))
+    indexes = [batch] if batch is not None else range(reader.num_record_batches)
+    batches = [
+        pa.ipc.read_record_batch(reader.get_batch(index).serialize(), reader.schema)
+        for index in indexes
+    ]
+    return pa.Table.from_batches(batches, schema=reader.schema)
+
+def _shared_memory_to_table(name: str, size: int, batch: int = None) -> pa.Table:
+    """Copia um bloco Arrow (ou só um record batch dele) da memória compartilhada para o processo.
+    
+    O bloco não é removido: quem o criou é responsável pelo unlink.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return _copy_arrow_batches(shm.buf, size, batch)
+    except Exception as e:
+        traceback.clear_frames(e.__traceback__)
+        raise
+    finally:
+        shm.close()
+
+def _table_to_df(table: pa.Table) -> pd.DataFrame:
+    """Converte tabela Arrow em DataFrame com a mesma representação de nulos do caminho serial."""
+    df = table.to_pandas()
+    
+    # Arrow devolve nulos de colunas texto como None; o caminho serial mantém NaN
+    for col in df.select_dtypes(include='object').columns:
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+def _unlink_shared_memory(name: str):
+    """Remove um bloco de memória compartilhada, ignorando blocos já removidos."""
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+def _concat_partitions(tables: list) -> pa.Table:
+    """Concatena as partições limpas sob um único schema.
+    
+    Partições vazias são descartadas (seus tipos saem de DataFrames sem linhas) e
+    colunas só com nulos em uma partição assumem o tipo das demais. Tipos realmente
+    divergentes levantam pa.ArrowInvalid no cast.
+    """
+    tables = [table for table in tables if table.num_rows > 0] or tables[:1]
+    fields = []
+    for index, field in enumerate(tables[0].schema):
+        types = [table.schema.field(index).type for table in tables]
+        typed = [field_type for field_type in types if field_type != pa.null()]
+        fields.append(field.with_type(typed[0] if typed else pa.null()))
+    schema = pa.schema(fields, metadata=tables[0].schema.metadata)
+    return pa.concat_tables([table.cast(schema) for table in tables])
+
+def _clean_sales_partition(source: tuple, index: int, bounds: tuple, loaded_at: datetime) -> tuple:
+    """Limpa uma partição de vendas lida da memória compartilhada e grava o resultado em outro bloco."""
+    logging.info(f"Partição {index}: linhas {bounds[0]} a {bounds[1] - 1}")
+    partition = _table_to_df(_shared_memory_to_table(*source, batch=index))
+    cleaned = clean_sales_data(partition, loaded_at=loaded_at)
+    return _table_to_shared_memory(pa.Table.from_pandas(cleaned, preserve_index=True))
+
+def clean_sales_data_parallel(df: pd.DataFrame, workers: int = BRONZE_WORKERS,
+                              loaded_at: datetime = None) -> pd.DataFrame:
+    """Limpeza dos dados de vendas em paralelo, particionando por faixas de linhas.
+    
+    Resultado idêntico a clean_sales_data: as partições são contíguas, o índice é
+    preservado e LOADED_AT é único para todas. A entrada é serializada uma única vez
+    em Arrow IPC na memória compartilhada (um record batch por partição) e cada
+    worker devolve sua partição limpa em outro bloco, sem pickle de DataFrames.
+    Cada worker registra os logs de limpeza da sua partição.
+    """
+    workers = min(workers, len(df))
+    if workers <= 1:
+        return clean_sales_data(df, loaded_at=loaded_at)
+    
+    logging.info(f"Iniciando limpeza paralela dos dados de vendas ({workers} workers)...")
+    loaded_at = loaded_at or datetime.now(timezone.utc)
+    try:
+        df_clean = _clean_sales_data_pool(df, workers, loaded_at)
+    except pa.ArrowException as e:
+        # Ex.: coluna object com tipos mistos (chunks do read_sales_csv_safe); o serial aceita
+        logging.warning(f"Dados não convertem para Arrow, usando limpeza serial: {e}")
+        return clean_sales_data(df, loaded_at=loaded_at)
+    
+    final_rows = len(df_clean)
+    initial_rows = len(df)
+    logging.info(f"Limpeza concluída. Shape final: {df_clean.shape}")
+    logging.info(f"Linhas preservadas: {final_rows}/{initial_rows} ({final_rows/initial_rows*100:.1f}%)")
+    log_data_quality_metrics(df_clean, "sales_bronze")
+    
+    return df_clean
+
+def _clean_sales_data_pool(df: pd.DataFrame, workers: int, loaded_at: datetime) -> pd.DataFrame:
+    """Executa as partições no pool de processos e remonta o DataFrame limpo."""
+    initial_rows = len(df)
+    log_data_quality_metrics(df, "sales_raw")
+    
+    cuts = np.linspace(0, initial_rows, workers + 1, dtype=int)
+    bounds = list(zip(cuts[:-1].tolist(), cuts[1:].tolist()))
+    
+    source = None
+    outputs, errors = [], []
+    try:
+        source = _table_to_shared_memory(pa.Table.from_pandas(df, preserve_index=True), bounds)
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_clean_sales_partition, source, index, bounds[index], loaded_at)
+                for index in range(workers)
+            ]
+            # Aguarda todas as partições para que os blocos das que concluíram sejam liberados
+            for future in futures:
+                try:
+                    outputs.append(future.result())
+                except Exception as e:
+                    errors.append(e)
+        if errors:
+            raise errors[0]
+        
+        df_clean = _table_to_df(_concat_partitions(
+            [_shared_memory_to_table(name, size) for name, size in outputs]
+        ))
+        # Mesmo índice do dropna(how='all') serial, inclusive o tipo (ex.: RangeIndex)
+        kept_rows = df.notna().any(axis=1).to_numpy()
+        if kept_rows.all():
+            df_clean.index = df.index
+        elif kept_rows.sum() == len(df_clean):
+            df_clean.index = df.index[kept_rows]
+    except pa.ArrowException:
+        # Tratado em clean_sales_data_parallel com fallback para o caminho serial
+        raise
+    except Exception as e:
+        logging.error(f"Erro na limpeza paralela dos dados de vendas: {e}")
+        raise
+    finally:
+        for name, _ in ([source] if source else []) + outputs:
+            _unlink_shared_memory(name)
+    return df_clean
+
 def clean_channel_data(df: pd.DataFrame) -> pd.DataFrame:
     """Limpeza básica dos dados de canal para camada Bronze."""
     logging.info("Iniciando limpeza dos dados de canal...")
@@ -288,7 +468,7 @@ def run_etl():
             raise Exception("Arquivo de canal (channel) não encontrado")
         
         logging.info("Aplicando limpeza de dados (preservando todos os registros)...")
-        sales_bronze = clean_sales_data(sales_df)
+        sales_bronze = clean_sales_data_parallel(sales_df, BRONZE_WORKERS)
         channel_bronze = clean_channel_data(channel_df)
         
         # Garantir que dataset existe
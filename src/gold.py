@@ -1,6 +1,9 @@
 import os
 import logging
+import uuid
+from datetime import datetime, timezone
 from google.cloud import bigquery
+from ranking_kpis import RANKING_DIMENSIONS, RANKING_TIES, RANKING_KPIS, RankingKPI
 
 # ==============================
 # CONFIGURAÇÕES E LOGS
@@ -14,6 +17,7 @@ PROJECT_ID = os.getenv("PROJECT_ID", "ambev-2025")
 DATASET_ID_SILVER = "abi_silver"
 DATASET_ID_GOLD = "abi_gold"
 REGION = "us-central1"
+RUN_ID = os.getenv("GOLD_RUN_ID") or f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
 
 
 
@@ -43,32 +47,108 @@ def ensure_dataset():
         logging.info(f"Dataset '{DATASET_ID_GOLD}' criado com sucesso!")
 
 # ==============================
-# QUERIES GOLD
+# REGISTRO DA EXECUÇÃO GOLD
+# ==============================
+def record_gold_run(run_id: str):
+    """Registra a execução concluída em gold_runs (usado pelo serving para invalidar o cache).
+
+    gold_runs não expira: o dataset GOLD tem expiração padrão de 30 dias e, sem a tabela,
+    o serving fica sem execução para carregar.
+    """
+    table_id = f"{PROJECT_ID}.{DATASET_ID_GOLD}.gold_runs"
+    client.query(f"""
+    CREATE TABLE IF NOT EXISTS `{table_id}` (
+      run_id STRING NOT NULL,
+      finished_at TIMESTAMP NOT NULL
+    );
+    ALTER TABLE `{table_id}` SET OPTIONS (expiration_timestamp = NULL);
+    INSERT INTO `{table_id}` (run_id, finished_at)
+    VALUES (@run_id, CURRENT_TIMESTAMP());
+    """, job_config=bigquery.QueryJobConfig(
+        query_parameters=[bigquery.ScalarQueryParameter("run_id", "STRING", run_id)]
+    )).result()
+    logging.info(f"Execução GOLD registrada: {run_id}")
+
 # ==============================
+# MOTOR DE RANKINGS (TOP-N / BOTTOM-N)
+# ==============================
+
+def _grouping_select(partition: str, entity: str, source: str) -> str:
+    """Agrega usd_volume por partição e entidade a partir de uma fonte com as chaves da fato."""
+    joins = []
+    for dimension in (partition, entity):
+        alias, _, table, key = RANKING_DIMENSIONS[dimension]
+        joins.append(
+            f"  JOIN `{PROJECT_ID}.{DATASET_ID_SILVER}.{table}` {alias} ON f.{key} = {alias}.{key}"
+        )
+    partition_col = "{0}.{1}".format(*RANKING_DIMENSIONS[partition][:2])
+    entity_col = "{0}.{1}".format(*RANKING_DIMENSIONS[entity][:2])
+    return f"""  SELECT
+    {partition_col} AS {partition},
+    {entity_col} AS {entity},
+    SUM(f.usd_volume) AS total_sales_usd
+  FROM {source} f
+{chr(10).join(joins)}
+  GROUP BY {partition}, {entity}"""
 
-# 1️⃣ Top 3 Trade Groups por Região
-QUERY_1 = f"""
-CREATE OR REPLACE TABLE `{PROJECT_ID}.{DATASET_ID_GOLD}.sales_top3_tradegroups_by_region` AS
-WITH ranked_sales AS (
+def _ranking_select(kpi: RankingKPI, source: str) -> str:
+    """Ranqueia uma agregação (partição, entidade, total_sales_usd) e filtra pelo N."""
+    return f"""CREATE OR REPLACE TABLE `{PROJECT_ID}.{DATASET_ID_GOLD}.{kpi.table_name}` AS
+WITH ranked AS (
   SELECT
-    d.btlr_org_lvl_c_desc AS region,
-    c.trade_chnl_desc AS trade_group,
-    SUM(f.usd_volume) AS total_sales_usd,
-    ROW_NUMBER() OVER (
-      PARTITION BY d.btlr_org_lvl_c_desc
-      ORDER BY SUM(f.usd_volume) DESC
+    {kpi.partition},
+    {kpi.entity},
+    total_sales_usd,
+    {RANKING_TIES[kpi.ties]} OVER (
+      PARTITION BY {kpi.partition}
+      ORDER BY total_sales_usd {kpi.direction}
     ) AS rank
-  FROM `{PROJECT_ID}.{DATASET_ID_SILVER}.fact_sales` f
-  JOIN `{PROJECT_ID}.{DATASET_ID_SILVER}.dim_distributor` d ON f.distributor_id = d.distributor_id
-  JOIN `{PROJECT_ID}.{DATASET_ID_SILVER}.dim_channel` c ON f.channel_id = c.channel_id
-  GROUP BY region, trade_group
+  FROM {source}
 )
-SELECT region, trade_group, total_sales_usd
-FROM ranked_sales
-WHERE rank <= 3
-ORDER BY region, total_sales_usd DESC;
+SELECT {kpi.partition}, {kpi.entity}, total_sales_usd, rank
+FROM ranked
+WHERE rank <= {kpi.n}
+ORDER BY {kpi.partition}, total_sales_usd {kpi.direction};
 """
 
+def build_ranking_script(kpis: list) -> str:
+    """Gera um script BigQuery que calcula vários rankings com uma única varredura de fact_sales.
+
+    A fato é agregada uma vez pelas chaves das dimensões usadas; cada agrupamento
+    (partição, entidade) é calculado uma vez sobre esse resultado e compartilhado
+    pelos KPIs que o usam.
+    """
+    if not kpis:
+        raise ValueError("Nenhum KPI de ranking informado")
+
+    keys = sorted({
+        RANKING_DIMENSIONS[dimension][3]
+        for kpi in kpis
+        for dimension in kpi.grouping
+    })
+    statements = [f"""CREATE TEMP TABLE fact_sales_by_key AS
+SELECT
+  {", ".join(keys)},
+  SUM(usd_volume) AS usd_volume
+FROM `{PROJECT_ID}.{DATASET_ID_SILVER}.fact_sales`
+GROUP BY {", ".join(keys)};
+"""]
+
+    groupings = {}
+    for kpi in kpis:
+        if kpi.grouping not in groupings:
+            groupings[kpi.grouping] = f"sales_by_{kpi.partition}_{kpi.entity}"
+            grouped = _grouping_select(kpi.partition, kpi.entity, "fact_sales_by_key")
+            statements.append(f"CREATE TEMP TABLE {groupings[kpi.grouping]} AS\n{grouped};\n")
+
+    for kpi in kpis:
+        statements.append(_ranking_select(kpi, groupings[kpi.grouping]))
+    return "\n".join(statements)
+
+# ==============================
+# QUERIES GOLD
+# ==============================
+
 # 2️⃣ Vendas por Marca e Mês
 QUERY_2 = f"""
 CREATE OR REPLACE TABLE `{PROJECT_ID}.{DATASET_ID_GOLD}.sales_by_brand_month` AS
@@ -83,36 +163,6 @@ GROUP BY brand_name, year, month
 ORDER BY brand_name, year, month;
 """
 
-# 3️⃣ Marca com Menor Volume por Região
-QUERY_3 = f"""
-CREATE OR REPLACE TABLE `{PROJECT_ID}.{DATASET_ID_GOLD}.lowest_brand_by_region` AS
-WITH brand_sales AS (
-  SELECT
-    d.btlr_org_lvl_c_desc AS region,
-    b.brand AS brand_name,
-    SUM(f.usd_volume) AS total_sales_usd
-  FROM `{PROJECT_ID}.{DATASET_ID_SILVER}.fact_sales` f
-  JOIN `{PROJECT_ID}.{DATASET_ID_SILVER}.dim_brand` b ON f.brand_id = b.brand_id
-  JOIN `{PROJECT_ID}.{DATASET_ID_SILVER}.dim_distributor` d ON f.distributor_id = d.distributor_id
-  GROUP BY region, brand_name
-),
-ranked AS (
-  SELECT
-    region,
-    brand_name,
-    total_sales_usd,
-    ROW_NUMBER() OVER (
-      PARTITION BY region
-      ORDER BY total_sales_usd ASC
-    ) AS rank
-  FROM brand_sales
-)
-SELECT region, brand_name, total_sales_usd
-FROM ranked
-WHERE rank = 1
-ORDER BY region;
-"""
-
 # ==============================
 # EXECUÇÃO PRINCIPAL
 # ==============================
@@ -120,8 +170,11 @@ if __name__ == "__main__":
     logging.info("🚀 Iniciando camada GOLD da Ambev...")
     ensure_dataset()
 
-    create_table_from_query(QUERY_1, "Top 3 Trade Groups por Região")
+    create_table_from_query(
+        build_ranking_script(RANKING_KPIS),
+        "Rankings (" + ", ".join(kpi.description for kpi in RANKING_KPIS) + ")"
+    )
     create_table_from_query(QUERY_2, "Vendas por Marca e Mês")
-    create_table_from_query(QUERY_3, "Menor Marca por Região")
+    record_gold_run(RUN_ID)
 
     logging.info("🎉 Tabelas GOLD criadas com sucesso!")
@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+
+# ==============================
+# DEFINIÇÕES DOS KPIs DE RANKING
+# ==============================
+# Sem dependência de BigQuery: usado pelo gold.py (geração do SQL) e pelo
+# serving.py (tabelas e rotas de ranking).
+
+# Dimensões disponíveis: nome -> (alias, coluna, tabela de dimensão, chave)
+RANKING_DIMENSIONS = {
+    "region": ("d", "btlr_org_lvl_c_desc", "dim_distributor", "distributor_id"),
+    "trade_group": ("c", "trade_chnl_desc", "dim_channel", "channel_id"),
+    "brand_name": ("b", "brand", "dim_brand", "brand_id"),
+}
+RANKING_TIES = {
+    "row_number": "ROW_NUMBER()",  # sem empates: exatamente N por partição
+    "rank": "RANK()",              # empates compartilham posição, pode passar de N
+    "dense_rank": "DENSE_RANK()",  # empates compartilham posição, sem saltos
+}
+
+@dataclass(frozen=True)
+class RankingKPI:
+    """Definição de um KPI de ranking: N entidades por partição, ordenadas por usd_volume."""
+    table_name: str
+    partition: str
+    entity: str
+    n: int
+    direction: str = "DESC"
+    ties: str = "row_number"
+    description: str = ""
+
+    def __post_init__(self):
+        for dimension in (self.partition, self.entity):
+            if dimension not in RANKING_DIMENSIONS:
+                raise ValueError(f"Dimensão de ranking desconhecida: {dimension}")
+        if self.partition == self.entity:
+            raise ValueError("Partição e entidade do ranking devem ser diferentes")
+        if self.direction not in ("ASC", "DESC"):
+            raise ValueError(f"Direção inválida: {self.direction}. Use ASC ou DESC")
+        if self.ties not in RANKING_TIES:
+            raise ValueError(f"Tratamento de empates inválido: {self.ties}")
+        if self.n < 1:
+            raise ValueError("N do ranking deve ser maior ou igual a 1")
+
+    @property
+    def grouping(self) -> tuple:
+        return (self.partition, self.entity)
+
+# ==============================
+# KPIs DE RANKING DA GOLD
+# ==============================
+# Cada item vira uma tabela em abi_gold (gold.py) e uma rota em /kpi/ranking/<tabela> (serving.py)
+RANKING_KPIS = [
+    # 1️⃣ Top 3 Trade Groups por Região
+    RankingKPI(
+        table_name="sales_top3_tradegroups_by_region",
+        partition="region",
+        entity="trade_group",
+        n=3,
+        direction="DESC",
+        description="Top 3 Trade Groups por Região",
+    ),
+    # 3️⃣ Marca com Menor Volume por Região
+    RankingKPI(
+        table_name="lowest_brand_by_region",
+        partition="region",
+        entity="brand_name",
+        n=1,
+        direction="ASC",
+        description="Menor Marca por Região",
+    ),
+]
@@ -0,0 +1,341 @@
+import os
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from google.cloud import bigquery
+import pandas as pd
+from ranking_kpis import RANKING_KPIS
+
+# ==============================
+# CONFIGURAÇÕES E LOGS
+# ==============================
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+PROJECT_ID = os.getenv("PROJECT_ID", "ambev-2025")
+DATASET_ID_GOLD = os.getenv("DATASET_GOLD", "abi_gold")
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+REFRESH_INTERVAL_SECONDS = float(os.getenv("REFRESH_INTERVAL_SECONDS", "60"))
+PORT = int(os.getenv("PORT", "8080"))
+
+# Janela de time travel do dataset GOLD (max_time_travel_hours, padrão do BigQuery: 7 dias)
+TIME_TRAVEL_WINDOW = timedelta(hours=float(os.getenv("TIME_TRAVEL_HOURS", "168")))
+TIME_TRAVEL_MARGIN = timedelta(hours=1)
+SNAPSHOT_LOAD_ATTEMPTS = 3
+
+# Rankings vêm de RANKING_KPIS: KPI novo no gold.py já é servido em /kpi/ranking/<tabela>
+RANKINGS = {kpi.table_name: kpi for kpi in RANKING_KPIS}
+GOLD_TABLES = ("sales_by_brand_month",) + tuple(RANKINGS)
+
+class SnapshotNotReady(Exception):
+    """Nenhum snapshot GOLD carregado ainda (gold_runs vazio ou inacessível)."""
+
+# ==============================
+# CACHE COM TTL
+# ==============================
+class TTLCache:
+    """Cache em memória com expiração por TTL, seguro para múltiplas threads."""
+
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._data) >= self.max_entries:
+                # Remove a entrada mais antiga (dict preserva a ordem de inserção)
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+# ==============================
+# SNAPSHOT DAS TABELAS GOLD
+# ==============================
+def _to_records(df: pd.DataFrame) -> list:
+    """Converte DataFrame em lista de dicts com tipos nativos (serializáveis em JSON)."""
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+def _index_by(records: list, column: str) -> dict:
+    """Indexa registros por uma coluna para lookups sem varrer a tabela."""
+    index = defaultdict(list)
+    for record in records:
+        index[record[column]].append(record)
+    return dict(index)
+
+class GoldSnapshot:
+    """Cópia imutável das tabelas GOLD de uma execução, indexada para lookups."""
+
+    def __init__(self, run_id: str, tables: dict):
+        self.run_id = run_id
+        self.loaded_at = time.time()
+
+        # Rankings: registros ordenados por partição e posição, indexados pela partição
+        self.rankings = {}
+        for table_name, kpi in RANKINGS.items():
+            df = tables[table_name].sort_values(
+                [kpi.partition, "total_sales_usd"], ascending=[True, kpi.direction == "ASC"]
+            )
+            if "rank" not in df.columns:
+                # Tabelas geradas antes da coluna rank: posição dentro da partição
+                df = df.assign(rank=df.groupby(kpi.partition).cumcount() + 1)
+            records = _to_records(df.sort_values([kpi.partition, "rank"], kind="stable"))
+            self.rankings[table_name] = _index_by(records, kpi.partition)
+
+        brand_month = _to_records(
+            tables["sales_by_brand_month"].sort_values(["brand_name", "year", "month"])
+        )
+        self.brand_month = brand_month
+        self.brand_month_by_brand = _index_by(brand_month, "brand_name")
+
+# ==============================
+# SERVIÇO DE KPIs
+# ==============================
+class KPIService:
+    """Serve KPIs GOLD a partir de um snapshot local, com cache invalidado por run_id."""
+
+    def __init__(self, bq_client: bigquery.Client = None, cache: TTLCache = None):
+        self.client = bq_client or bigquery.Client(project=PROJECT_ID)
+        self.cache = cache or TTLCache()
+        self.snapshot = None
+        self._refresh_lock = threading.Lock()
+
+    def latest_run(self) -> tuple:
+        """Retorna (run_id, finished_at) da última execução GOLD concluída."""
+        query = f"""
+        SELECT run_id, finished_at
+        FROM `{PROJECT_ID}.{DATASET_ID_GOLD}.gold_runs`
+        ORDER BY finished_at DESC
+        LIMIT 1
+        """
+        rows = list(self.client.query(query).result())
+        if not rows:
+            raise SnapshotNotReady("Nenhuma execução GOLD registrada em gold_runs")
+        return rows[0]["run_id"], rows[0]["finished_at"]
+
+    def load_snapshot(self, run_id: str, finished_at) -> GoldSnapshot:
+        """Lê as tabelas GOLD do BigQuery para a execução run_id.
+
+        Dentro da janela de time travel, todas as tabelas são lidas no instante em que a
+        execução terminou (FOR SYSTEM_TIME AS OF), então uma execução GOLD em andamento não
+        mistura dados no snapshot. Fora dela lê as tabelas atuais; refresh confere o run_id.
+        """
+        time_travel = ""
+        job_config = bigquery.QueryJobConfig()
+        if datetime.now(timezone.utc) - finished_at < TIME_TRAVEL_WINDOW - TIME_TRAVEL_MARGIN:
+            time_travel = "FOR SYSTEM_TIME AS OF @finished_at"
+            job_config.query_parameters = [
+                bigquery.ScalarQueryParameter("finished_at", "TIMESTAMP", finished_at)
+            ]
+        else:
+            logging.info(f"Execução GOLD {run_id} fora da janela de time travel, lendo tabelas atuais.")
+
+        tables = {}
+        for table_name in GOLD_TABLES:
+            query = f"""
+            SELECT *
+            FROM `{PROJECT_ID}.{DATASET_ID_GOLD}.{table_name}`
+            {time_travel}
+            """
+            tables[table_name] = self.client.query(query, job_config=job_config).to_dataframe()
+            logging.info(f"Snapshot GOLD: {table_name} ({len(tables[table_name])} linhas)")
+        return GoldSnapshot(run_id, tables)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Recarrega o snapshot se houver nova execução GOLD. Retorna True se recarregou."""
+        with self._refresh_lock:
+            run_id, finished_at = self.latest_run()
+            if not force and self.snapshot is not None and self.snapshot.run_id == run_id:
+                return False
+
+            for _ in range(SNAPSHOT_LOAD_ATTEMPTS):
+                logging.info(f"Carregando snapshot da execução GOLD {run_id}...")
+                snapshot = self.load_snapshot(run_id, finished_at)
+                # Nova execução concluída durante a carga: as tabelas lidas podem ser de outro run
+                latest_run_id, latest_finished_at = self.latest_run()
+                if latest_run_id == run_id:
+                    break
+                logging.warning(f"Execução GOLD {latest_run_id} concluída durante a carga, recarregando...")
+                run_id, finished_at = latest_run_id, latest_finished_at
+            else:
+                raise RuntimeError(
+                    f"gold_runs mudou durante {SNAPSHOT_LOAD_ATTEMPTS} cargas seguidas do snapshot"
+                )
+
+            # Troca atômica: lookups em andamento continuam no snapshot anterior
+            self.snapshot = snapshot
+            self.cache.clear()
+            logging.info(f"Snapshot GOLD {run_id} ativo, cache invalidado.")
+            return True
+
+    def start_auto_refresh(self, interval: float = REFRESH_INTERVAL_SECONDS) -> threading.Thread:
+        """Verifica periodicamente novas execuções GOLD em uma thread de fundo."""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logging.error(f"Erro ao atualizar snapshot GOLD: {e}")
+
+        thread = threading.Thread(target=loop, name="gold-refresh", daemon=True)
+        thread.start()
+        return thread
+
+    def _cached(self, name: str, params: tuple, compute):
+        snapshot = self.snapshot
+        if snapshot is None:
+            raise SnapshotNotReady("Snapshot GOLD ainda não carregado")
+
+        key = (snapshot.run_id, name, params)
+        result = self.cache.get(key)
+        if result is None:
+            result = compute(snapshot)
+            self.cache.set(key, result)
+        return result
+
+    def ranking(self, table_name: str, partition_value: str = None, n: int = None) -> list:
+        """Lookup de um KPI de RANKING_KPIS: posições 1..n (padrão: N do KPI) por partição.
+
+        Com empates (ties rank/dense_rank) a posição é a da GOLD, então pode vir mais de n linhas.
+        """
+        kpi = RANKINGS.get(table_name)
+        if kpi is None:
+            raise KeyError(f"KPI de ranking desconhecido: {table_name}")
+        n = kpi.n if n is None else n
+        if not 1 <= n <= kpi.n:
+            raise ValueError(f"n deve estar entre 1 e {kpi.n}, recebido: {n}")
+
+        def compute(snapshot):
+            index = snapshot.rankings[table_name]
+            if partition_value is not None:
+                partitions = [index.get(partition_value, [])]
+            else:
+                partitions = index.values()
+            return [record for records in partitions for record in records if record["rank"] <= n]
+        return self._cached(table_name, (partition_value, n), compute)
+
+    def top_tradegroups(self, region: str = None, n: int = 3) -> list:
+        """Top N trade groups por região (N de 1 a 3, o top 3 materializado na GOLD)."""
+        return self.ranking("sales_top3_tradegroups_by_region", region, n)
+
+    def sales_by_brand_month(self, brand: str = None, year: int = None, month: int = None) -> list:
+        """Vendas por marca e mês, filtráveis por marca, ano e mês."""
+        def compute(snapshot):
+            if brand is not None:
+                records = snapshot.brand_month_by_brand.get(brand, [])
+            else:
+                records = snapshot.brand_month
+            return [
+                record for record in records
+                if (year is None or record["year"] == year)
+                and (month is None or record["month"] == month)
+            ]
+        return self._cached("sales_by_brand_month", (brand, year, month), compute)
+
+    def lowest_brand(self, region: str = None) -> list:
+        """Marca com menor volume por região."""
+        return self.ranking("lowest_brand_by_region", region)
+
+# ==============================
+# API HTTP
+# ==============================
+def _optional_int(params: dict, name: str):
+    value = params.get(name)
+    return int(value) if value is not None else None
+
+def _ranking_route(service: KPIService, table_name: str):
+    partition = RANKINGS[table_name].partition
+    return lambda p: service.ranking(table_name, p.get(partition), _optional_int(p, "n"))
+
+def make_handler(service: KPIService):
+    """Cria o handler HTTP com rotas de lookup dos KPIs GOLD."""
+    routes = {
+        f"/kpi/ranking/{table_name}": _ranking_route(service, table_name)
+        for table_name in RANKINGS
+    }
+    routes.update({
+        "/kpi/top-tradegroups": lambda p: service.top_tradegroups(
+            p.get("region"), 3 if p.get("n") is None else int(p["n"])
+        ),
+        "/kpi/brand-month": lambda p: service.sales_by_brand_month(
+            p.get("brand"), _optional_int(p, "year"), _optional_int(p, "month")
+        ),
+        "/kpi/lowest-brand": lambda p: service.lowest_brand(p.get("region")),
+    })
+
+    class KPIHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            try:
+                if url.path == "/health":
+                    snapshot = service.snapshot
+                    if snapshot is None:
+                        self._send(503, {"ready": False, "run_id": None})
+                    else:
+                        self._send(200, {"ready": True, "run_id": snapshot.run_id})
+                elif url.path in routes:
+                    self._send(200, routes[url.path](params))
+                else:
+                    self._send(404, {"error": f"Rota não encontrada: {url.path}"})
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+            except SnapshotNotReady as e:
+                self._send(503, {"error": str(e)})
+            except Exception as e:
+                logging.error(f"Erro ao servir {self.path}: {e}")
+                self._send(500, {"error": str(e)})
+
+        def _send(self, status: int, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logging.debug(format % args)
+
+    return KPIHandler
+
+# ==============================
+# EXECUÇÃO PRINCIPAL
+# ==============================
+if __name__ == "__main__":
+    logging.info("🚀 Iniciando serving de KPIs GOLD...")
+    service = KPIService()
+    try:
+        service.refresh()
+    except Exception as e:
+        # Sobe sem snapshot: /health responde 503 e a thread de fundo tenta de novo
+        logging.warning(f"Snapshot GOLD indisponível na inicialização: {e}")
+    service.start_auto_refresh()
+
+    server = ThreadingHTTPServer(("0.0.0.0", PORT), make_handler(service))
+    logging.info(f"Serving GOLD escutando na porta {PORT}")
+    server.serve_forever()
@@ -31,6 +31,11 @@ resource "google_cloud_run_v2_job" "etl_bronze_job" {
           value = google_storage_bucket.beverage_mvp.name
         }
 
+        env {
+          name  = "BRONZE_WORKERS"
+          value = tostring(var.bronze_workers)
+        }
+
         env {
           name  = "REGION"
           value = var.region
@@ -41,10 +46,11 @@ resource "google_cloud_run_v2_job" "etl_bronze_job" {
           value = var.environment
         }
 
+        # Um vCPU por worker; ~1Gi por worker no modo paralelo (pai + workers + blocos Arrow)
         resources {
           limits = {
-            cpu    = "1"
-            memory = "512Mi"
+            cpu    = tostring(var.bronze_workers)
+            memory = var.bronze_workers > 1 ? "${var.bronze_workers}Gi" : "512Mi"
           }
         }
       }
@@ -185,6 +191,73 @@ resource "google_cloud_run_v2_job" "etl_gold_job" {
   ]
 }
 
+##############################
+# CLOUD RUN SERVICE (SERVING DE KPIs GOLD)
+##############################
+resource "google_cloud_run_v2_service" "kpi_serving" {
+  name     = "kpi-serving-${var.environment}"
+  project  = var.project_id
+  location = var.region
+  deletion_protection = false
+
+  # Sem binding allUsers: só identidades com roles/run.invoker chamam o serviço
+  ingress = "INGRESS_TRAFFIC_INTERNAL_LOAD_BALANCER"
+
+  template {
+    service_account = google_service_account.pipeline_sa.email
+
+    # Snapshot e cache ficam em memória: manter instância quente evita recarga a cada cold start
+    scaling {
+      min_instance_count = 1
+      max_instance_count = var.resource_settings[var.environment].max_instances
+    }
+
+    containers {
+      image = "gcr.io/${var.project_id}/etl-serving:latest"
+
+      ports {
+        container_port = 8080
+      }
+
+      env {
+        name  = "PROJECT_ID"
+        value = var.project_id
+      }
+
+      env {
+        name  = "DATASET_GOLD"
+        value = "abi_gold"
+      }
+
+      env {
+        name  = "REFRESH_INTERVAL_SECONDS"
+        value = "60"
+      }
+
+      env {
+        name  = "CACHE_TTL_SECONDS"
+        value = "300"
+      }
+
+      resources {
+        # CPU sempre alocada para a thread que verifica novas execuções GOLD
+        cpu_idle = false
+        limits = {
+          cpu    = "1"
+          memory = "1Gi"
+        }
+      }
+    }
+
+    execution_environment = "EXECUTION_ENVIRONMENT_GEN2"
+  }
+
+  depends_on = [
+    google_service_account.pipeline_sa,
+    google_bigquery_dataset.abi_gold
+  ]
+}
+
 ##############################
 # CLOUD SCHEDULER (AGENDAMENTO DIÁRIO - BRONZE APENAS)
 ##############################
@@ -37,6 +37,17 @@ variable "environment" {
   }
 }
 
+variable "bronze_workers" {
+  description = "Workers da limpeza paralela de vendas no ETL Bronze (1 = serial). Define também cpu e memória do job."
+  type        = number
+  default     = 1
+
+  validation {
+    condition     = contains([1, 2, 4, 8], var.bronze_workers)
+    error_message = "bronze_workers must be 1, 2, 4, or 8 (valid Cloud Run cpu values)."
+  }
+}
+
 # Nova variável para configurações específicas por ambiente
 variable "resource_settings" {
   description = "Configurações de recursos por ambiente"